@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite for the AAIdrive Python Tooling
+===============================================
+
+This script measures the throughput and peak memory of the hot paths in
+the automation and usage scripts on synthetic inputs of several sizes.
+No network access is needed: Sentry events, commits, translation
+archives and car metrics are all generated locally from a fixed seed.
+
+Benchmarks
+----------
+
+- ``report_reduce``: ``ReportGenerator.reduce`` of every report in
+  ``usage/generate.py`` over a stream of Sentry events.
+- ``tags_dict``, ``car_identifier`` and ``format_number`` from
+  ``usage/generate.py``.
+- ``generate_metrics`` from ``simulate_car_data.py``.
+- ``extract_and_copy`` and ``validate_locale`` from
+  ``update_translations.py``, with ``size`` strings per locale.
+- ``format_release_notes`` from ``generate_release_notes.py``.
+
+Each benchmark processes ``size`` items per run. Runs are looped until a
+sample lasts at least 0.2 seconds, samples are taken in ``--repeat``
+rounds over all benchmarks, and throughput is taken from the median
+sample. Peak memory is measured with ``tracemalloc`` in a separate run.
+
+Usage:
+    python benchmark.py --save          # record a new baseline
+    python benchmark.py                 # compare against the baseline
+    python benchmark.py --only format_number --sizes 1000 100000
+
+When a baseline exists, the script exits with status 1 if any benchmark's
+peak memory grew by more than ``--margin`` (default 25%), or if even its
+fastest sample is slower than the baseline median by more than the margin
+plus the baseline's own spread. On a shared VM, where single samples of
+unchanged code vary by 30-40%, the fastest sample stayed within that
+spread, so the default only fails on real slowdowns of about a quarter.
+Baselines are machine specific, so record one on the machine that runs
+the comparison.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import timeit
+import tracemalloc
+import zipfile
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+USAGE_DIR = os.path.join(SCRIPT_DIR, os.pardir, "usage")
+sys.path[:0] = [SCRIPT_DIR, USAGE_DIR]
+
+import generate_release_notes  # noqa: E402
+import simulate_car_data  # noqa: E402
+import update_translations  # noqa: E402
+
+try:
+    import generate as usage_generate  # noqa: E402
+except ImportError:
+    # usage/generate.py needs requests even though no request is made here
+    usage_generate = None
+
+
+DEFAULT_BASELINE = os.path.join(SCRIPT_DIR, "benchmark_baseline.json")
+DEFAULT_SIZES = [100, 1000, 10000]
+DEFAULT_REPEAT = 5
+DEFAULT_MARGIN = 0.25
+SEED = 1234
+
+COUNTRIES = ["DE", "US", "GB", "NL", "FR", "IT", "ES", "SE", "PL", "JP"]
+VEHICLE_TYPES = ["F20", "F30", "G20", "G30", "F56", "F60", "I01", "G05"]
+LOCALES = ["de", "es", "fr", "it", "nl", "pl", "pt", "ro", "ru", "sv", "tr", "ja", "hu", "he"]
+
+
+def make_events(count: int) -> List[dict]:
+    """Create synthetic Sentry events shaped like the ones usage/generate.py reads."""
+    rng = random.Random(SEED)
+    events = []
+    for i in range(count):
+        brand = rng.choice(["BMW", "MINI"])
+        tags = [
+            {"key": "hmi_type", "value": f"{brand} ID{rng.choice([4, 5, 6])}"},
+            {"key": "vehicle_country", "value": rng.choice(COUNTRIES)},
+            {"key": "vehicle_type", "value": rng.choice(VEHICLE_TYPES)},
+            {"key": "user", "value": f"id:{rng.randrange(count // 3 + 1)}"},
+            {"key": "release", "value": "1.4.3"},
+        ]
+        user = {"id": f"user-{rng.randrange(count // 3 + 1)}"} if rng.random() > 0.1 else None
+        events.append({"tags": tags, "user": user, "dateCreated": f"2024-01-{i % 28 + 1:02d}T00:00:00Z"})
+    return events
+
+
+def make_commits(count: int) -> List[dict]:
+    """Create synthetic commits in the shape returned by the GitHub API."""
+    rng = random.Random(SEED)
+    return [
+        {
+            "sha": f"{rng.getrandbits(160):040x}",
+            "commit": {
+                "message": f"Change number {i}\n\nLonger description of change {i}",
+                "author": {"name": f"Author {i % 17}", "date": f"2024-02-{i % 28 + 1:02d}T12:34:56Z"},
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def make_strings_xml(count: int, translated: bool = False) -> bytes:
+    """Create a ``strings.xml`` with ``count`` strings, some with placeholders."""
+    lines = ['<?xml version="1.0" encoding="utf-8"?>', "<resources>"]
+    for i in range(count):
+        prefix = "Übersetzt" if translated else "Text"
+        if i % 5 == 0:
+            lines.append(f'    <string name="key_{i}">{prefix} %1$s and %2$d for {i}</string>')
+        else:
+            lines.append(f'    <string name="key_{i}">{prefix} number {i}</string>')
+    lines.append("</resources>")
+    return "\n".join(lines).encode("utf-8")
+
+
+def bench_report_reduce(size: int, workdir: Path) -> Callable[[], None]:
+    events = make_events(size)
+    reports = [
+        usage_generate.ReportGenerator(type(report.accumulator)(), report.reducer, report.formatter)
+        for report in usage_generate.REPORTS.values()
+    ]
+
+    def run():
+        for event in events:
+            for report in reports:
+                report.reduce(event)
+    return run
+
+
+def bench_tags_dict(size: int, workdir: Path) -> Callable[[], None]:
+    tag_lists = [event["tags"] for event in make_events(size)]
+    tags_dict = usage_generate.tags_dict
+
+    def run():
+        for tags in tag_lists:
+            tags_dict(tags)
+    return run
+
+
+def bench_car_identifier(size: int, workdir: Path) -> Callable[[], None]:
+    events = make_events(size)
+    car_identifier = usage_generate.car_identifier
+
+    def run():
+        for event in events:
+            car_identifier(event)
+    return run
+
+
+def bench_format_number(size: int, workdir: Path) -> Callable[[], None]:
+    rng = random.Random(SEED)
+    numbers = [rng.randint(1, 2_000_000_000) for _ in range(size)]
+    format_number = usage_generate.format_number
+
+    def run():
+        for number in numbers:
+            format_number(number)
+    return run
+
+
+def bench_generate_metrics(size: int, workdir: Path) -> Callable[[], None]:
+    random.seed(SEED)
+    state: dict = {}
+    generate_metrics = simulate_car_data.generate_metrics
+
+    def run():
+        for _ in range(size):
+            generate_metrics(state)
+    return run
+
+
+def bench_extract_and_copy(size: int, workdir: Path) -> Callable[[], None]:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for locale in LOCALES:
+            zf.writestr(f"values-{locale}/strings.xml", make_strings_xml(size, translated=True))
+    zip_bytes = buffer.getvalue()
+    target_dir = workdir / f"extract-{size}"
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            update_translations.extract_and_copy(zip_bytes, target_dir)
+    return run
+
+
+def bench_validate_locale(size: int, workdir: Path) -> Callable[[], None]:
+    base_path = workdir / f"strings-{size}.xml"
+    base_path.write_bytes(make_strings_xml(size))
+    base_index = update_translations.build_base_index(base_path)
+    data = make_strings_xml(size, translated=True)
+
+    def run():
+        update_translations.validate_locale("values-de/strings.xml", data, base_index)
+    return run
+
+
+def bench_format_release_notes(size: int, workdir: Path) -> Callable[[], None]:
+    commits = make_commits(size)
+
+    def run():
+        generate_release_notes.format_release_notes(commits)
+    return run
+
+
+# Each benchmark takes the input size and a scratch directory shared by the
+# whole run, and returns the function to time.
+Setup = Callable[[int, Path], Callable[[], None]]
+
+BENCHMARKS: Dict[str, Setup] = {
+    "report_reduce": bench_report_reduce,
+    "tags_dict": bench_tags_dict,
+    "car_identifier": bench_car_identifier,
+    "format_number": bench_format_number,
+    "generate_metrics": bench_generate_metrics,
+    "extract_and_copy": bench_extract_and_copy,
+    "validate_locale": bench_validate_locale,
+    "format_release_notes": bench_format_release_notes,
+}
+# Benchmarks that exercise usage/generate.py
+USAGE_BENCHMARKS = {"report_reduce", "tags_dict", "car_identifier", "format_number"}
+
+
+def measure(cases: Dict[str, Tuple[Setup, int]], repeat: int, workdir: Path) -> Dict[str, dict]:
+    """Time every benchmark case and trace one run of each for memory.
+
+    A single run of a small input takes well under a millisecond, so each
+    sample loops the run as many times as ``timeit.Timer.autorange`` needs
+    to reach 0.2 seconds. Samples are taken in ``repeat`` rounds over all
+    cases rather than back to back, so a burst of load on the machine
+    cannot slow down every sample of one benchmark. The median sample of
+    each case counts, which is more repeatable between runs than the
+    single fastest one.
+
+    Args:
+        cases: Mapping from result name to the benchmark setup and its size.
+        repeat: Number of sampling rounds.
+        workdir: Scratch directory shared by the benchmarks.
+
+    Returns:
+        A mapping from result name to a dict with the median ``seconds`` per
+        run, every sample in ``samples``, the ``throughput`` in items per
+        second and the ``peak_bytes`` allocated during a run.
+    """
+    timers = {}
+    for key, (setup, size) in cases.items():
+        timer = timeit.Timer(setup(size, workdir))
+        timers[key] = (timer, timer.autorange()[0])
+    samples: Dict[str, List[float]] = {key: [] for key in cases}
+    for _ in range(repeat):
+        for key, (timer, number) in timers.items():
+            samples[key].append(timer.timeit(number) / number)
+
+    results = {}
+    for key, (setup, size) in cases.items():
+        run = setup(size, workdir)
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        seconds = statistics.median(samples[key])
+        results[key] = {
+            "seconds": seconds,
+            "samples": samples[key],
+            "throughput": size / seconds if seconds > 0 else float("inf"),
+            "peak_bytes": peak,
+        }
+    return results
+
+
+def time_limit(expected: dict, margin: float) -> float:
+    """Return the seconds per run above which a result is slower than ``expected``.
+
+    The limit is the baseline median plus ``margin`` plus the baseline's
+    own noise, the spread between its median and its slowest sample.
+    Baselines saved without samples only get the margin.
+    """
+    median = expected["seconds"]
+    spread = max(expected.get("samples") or [median]) - median
+    return median * (1 + margin) + spread
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], margin: float) -> List[str]:
+    """Return a description of every result worse than the baseline.
+
+    Load on the machine only ever slows a sample down, so a benchmark
+    counts as slower when even its fastest sample exceeds
+    :func:`time_limit`. Peak memory is deterministic and compared directly.
+    """
+    failures = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        fastest = min(result.get("samples") or [result["seconds"]])
+        limit = time_limit(expected, margin)
+        if fastest > limit:
+            failures.append(
+                f"{name}: fastest run took {fastest * 1e3:,.3f} ms, above the limit of {limit * 1e3:,.3f} ms "
+                f"(baseline median {expected['seconds'] * 1e3:,.3f} ms)"
+            )
+        if result["peak_bytes"] > expected["peak_bytes"] * (1 + margin):
+            failures.append(
+                f"{name}: peak memory {result['peak_bytes']:,} B exceeds baseline {expected['peak_bytes']:,} B"
+            )
+    return failures
+
+
+def load_baseline(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the AAIdrive automation and usage scripts")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help=f"Input sizes to run every benchmark with (default: {' '.join(map(str, DEFAULT_SIZES))})",
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=sorted(BENCHMARKS),
+        help="Only run the named benchmarks",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help=f"Sampling rounds over all benchmarks; the median sample counts (default: {DEFAULT_REPEAT})",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=DEFAULT_BASELINE,
+        help="JSON file with the baseline results (default: benchmark_baseline.json next to this script)",
+    )
+    parser.add_argument(
+        "--margin",
+        type=float,
+        default=DEFAULT_MARGIN,
+        help=f"Allowed relative regression on top of the baseline noise before failing (default: {DEFAULT_MARGIN})",
+    )
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="Write the results to the baseline file instead of comparing against it",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> None:
+    args = parse_args(argv)
+    names = args.only or list(BENCHMARKS)
+    if usage_generate is None:
+        skipped = [name for name in names if name in USAGE_BENCHMARKS]
+        if skipped:
+            print(f"Skipping {', '.join(skipped)}: usage/generate.py could not be imported (is requests installed?)")
+        names = [name for name in names if name not in USAGE_BENCHMARKS]
+
+    cases = {f"{name}[{size}]": (BENCHMARKS[name], size) for name in names for size in args.sizes}
+    with tempfile.TemporaryDirectory(prefix="aaidrive-bench-") as workdir:
+        results = measure(cases, args.repeat, Path(workdir))
+    print(f"{'benchmark':<36} {'items/s':>14} {'peak memory':>14}")
+    for key, result in results.items():
+        print(f"{key:<36} {result['throughput']:>14,.0f} {result['peak_bytes']:>12,} B")
+
+    if args.save:
+        baseline = load_baseline(args.baseline) or {}
+        benchmarks = {**baseline.get("benchmarks", {}), **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "benchmarks": benchmarks}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save to record one.")
+        return
+    failures = compare(results, baseline.get("benchmarks", {}), args.margin)
+    for failure in failures:
+        print(f"Regression: {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.margin:.0%} of the baseline.")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -11,14 +11,50 @@ dependencies, but it assumes that the Android build tools and Gradle
 wrapper (gradlew) are available in the repository root.
 
 Usage:
-    python build_release.py [--clean] [--flavor FLAVOR]
+    python build_release.py [--clean | --clean-outputs] [--flavor FLAVOR]
+                            [--combined] [--compare] [--no-history]
+                            [--no-artifact-cache]
 
 Options:
     --clean          Perform a clean build by running `./gradlew clean` before
                      assembling the APKs.
+    --clean-outputs  Only delete the APK output directories of the selected
+                     flavors, keeping incremental build state intact.
     --flavor FLAVOR  Specify a build flavor: "sentry", "nonalytics", or
                      "all" (default). When "all" is selected, both release
                      variants will be assembled.
+    --combined       Assemble all selected flavors in a single Gradle
+                     invocation with parallel execution and the build cache
+                     enabled, paying the configuration phase only once.
+    --compare        Build once sequentially and once combined, and print
+                     the wall-clock time of both modes. Requires --clean
+                     so both builds start from the same state.
+    --no-history     Do not profile the build or record it in the build
+                     history file.
+    --history FILE   Build history file (default: .build_history.jsonl in
+                     the repository root).
+    --regression-threshold FRACTION
+                     Flag tasks that took this much longer than their
+                     rolling baseline (default: 0.25, i.e. 25%).
+
+Build history:
+    Unless --no-history is given, Gradle runs with `--profile`. The task
+    durations from its report, the wall-clock time and the APK sizes of
+    each invocation are appended to the history file. Tasks slower than
+    the median of the last few matching builds by more than the threshold
+    are reported as regressions, together with any APK size changes.
+
+Artifact cache:
+    Before a flavor is assembled, the script fingerprints the build inputs:
+    `app/src`, the Gradle files, `external/`, `spotify-app-remote/`,
+    `keystore.jks`, the git commit and tags that the version is derived
+    from, the user's `~/.gradle/gradle.properties` and the environment
+    variables read by the build. If the APKs of every variant of the
+    flavor were built from the same fingerprint before, they are restored
+    from the local artifact cache instead of calling Gradle. Freshly built
+    APKs are added to the cache. Use --no-artifact-cache to always build,
+    or --artifact-cache DIR to choose the cache location. The cache is
+    bypassed by --clean and --compare.
 
 Example:
     python build_release.py --clean --flavor sentry
@@ -30,9 +66,58 @@ Those steps should be performed separately using appropriate credentials.
 """
 
 import argparse
+import datetime
+import glob
+import hashlib
+import json
 import os
+import re
+import shutil
+import statistics
 import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+DEFAULT_HISTORY_FILE = ".build_history.jsonl"
+DEFAULT_REGRESSION_THRESHOLD = 0.25
+# Number of previous matching builds forming the rolling baseline.
+DEFAULT_BASELINE_WINDOW = 5
+# Tasks faster than this are too noisy to report as regressions.
+MIN_REGRESSION_SECONDS = 1.0
+
+DEFAULT_ARTIFACT_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "aaidrive-builds")
+# Paths relative to the repository root whose contents determine the APKs.
+BUILD_INPUTS = [
+    "app/src",
+    "app/build.gradle",
+    "app/buildtools",
+    "app/proguard-rules.pro",
+    "build.gradle",
+    "settings.gradle",
+    "gradle.properties",
+    "gradle",
+    "external",
+    "spotify-app-remote",
+    "keystore.jks",
+]
+# Environment variables read by the Gradle build. Only their hash is stored.
+BUILD_ENV_PREFIXES = ("AndroidAutoIdrive_", "KEYSTORE_", "ORG_GRADLE_PROJECT_")
+BUILD_ENV_NAMES = ("CI",)
+FINGERPRINT_WORKERS = 8
+
+DURATION_RE = re.compile(r"^(?:(\d+)d)?\s*(?:(\d+)h)?\s*(?:(\d+)m)?\s*(?:([\d.]+)s)?$")
+
+
+@dataclass
+class HistorySettings:
+    path: str
+    threshold: float = DEFAULT_REGRESSION_THRESHOLD
+    window: int = DEFAULT_BASELINE_WINDOW
 
 
 def run_command(command: list, cwd: str) -> None:
@@ -53,58 +138,570 @@ def run_command(command: list, cwd: str) -> None:
         raise subprocess.CalledProcessError(process.returncode, command)
 
 
-def build_variant(project_root: str, flavor: str) -> None:
+def variant_task(flavor: str) -> str:
+    """Return the Gradle task assembling the release variant of ``flavor``."""
+    return f"assemble{flavor.capitalize()}Release"
+
+
+def apk_root(project_root: str) -> str:
+    """Return the directory below which Gradle writes the APKs of every variant."""
+    return os.path.join(project_root, "app", "build", "outputs", "apk")
+
+
+def variant_dirs(project_root: str, flavor: str) -> List[str]:
+    """Return the release output directories of every variant of ``flavor``.
+
+    The app combines the map, analytics and storefront flavor dimensions,
+    so ``assembleSentryRelease`` writes to directories such as
+    ``nomapSentryFull/release`` and ``mapboxSentryFull/release``.
+    """
+    name = re.escape(flavor)
+    pattern = re.compile(rf"(^{name}|[a-z0-9]{name.capitalize()})([A-Z]|$)")
+    return sorted(
+        path
+        for path in glob.glob(os.path.join(apk_root(project_root), "*", "release"))
+        if pattern.search(os.path.basename(os.path.dirname(path)))
+    )
+
+
+def variant_apks(project_root: str, flavor: str) -> List[str]:
+    """Return every release APK Gradle produced for the variants of ``flavor``."""
+    return sorted(apk for path in variant_dirs(project_root, flavor) for apk in glob.glob(os.path.join(path, "*.apk")))
+
+
+def variant_apk_sizes(project_root: str, flavors: List[str]) -> Dict[str, int]:
+    """Return the total size of the release APKs of each built variant.
+
+    Keys are variant names such as ``nomapSentryFull``; APK file names are
+    not used because they contain the version.
+    """
+    return {
+        os.path.basename(os.path.dirname(path)): sum(os.path.getsize(apk) for apk in glob.glob(os.path.join(path, "*.apk")))
+        for flavor in flavors
+        for path in variant_dirs(project_root, flavor)
+    }
+
+
+def report_apk(project_root: str, flavor: str) -> None:
+    """Print where the APKs of ``flavor`` were built, or warn if there are none."""
+    apks = variant_apks(project_root, flavor)
+    for apk_path in apks:
+        print(f"Built APK located at: {apk_path}")
+    if not apks:
+        print(f"Warning: no {flavor} release APK found below {apk_root(project_root)}")
+
+
+def build_variant(project_root: str, flavor: str, gradle_args: Sequence[str] = ()) -> None:
     """Assemble a specific release variant using Gradle.
 
     Args:
         project_root: Path to the repository root where `gradlew` resides.
         flavor: The build flavor to assemble ("sentry" or "nonalytics").
+        gradle_args: Extra command line options for Gradle.
     """
-    variant_task = f"assemble{flavor.capitalize()}Release"
-    run_command(["./gradlew", variant_task], cwd=project_root)
-    apk_path = os.path.join(
-        project_root,
-        "app",
-        "build",
-        "outputs",
-        "apk",
-        flavor,
-        "release",
-        f"app-{flavor}-release.apk",
-    )
-    if os.path.exists(apk_path):
-        print(f"Built APK located at: {apk_path}")
+    run_command(["./gradlew", *gradle_args, variant_task(flavor)], cwd=project_root)
+    report_apk(project_root, flavor)
+
+
+def build_variants_combined(project_root: str, flavors: List[str], gradle_args: Sequence[str] = ()) -> None:
+    """Assemble several release variants in one parallel Gradle invocation.
+
+    Gradle configures the project once and can schedule the tasks of all
+    flavors together, reusing outputs from the local build cache.
+
+    Args:
+        project_root: Path to the repository root where `gradlew` resides.
+        flavors: The build flavors to assemble.
+        gradle_args: Extra command line options for Gradle.
+    """
+    tasks = [variant_task(flavor) for flavor in flavors]
+    run_command(["./gradlew", "--parallel", "--build-cache", *gradle_args, *tasks], cwd=project_root)
+    for flavor in flavors:
+        report_apk(project_root, flavor)
+
+
+def clean_outputs(project_root: str, flavors: List[str]) -> None:
+    """Delete only the per-variant APK output directories of the given flavors.
+
+    Unlike `./gradlew clean` this keeps intermediates, so Gradle can still
+    build incrementally, while making sure no stale APK is left behind.
+    """
+    for flavor in flavors:
+        for path in variant_dirs(project_root, flavor):
+            print(f"Removing {path}")
+            shutil.rmtree(path)
+
+
+def list_input_files(project_root: str) -> List[str]:
+    """Return the sorted relative paths of every build input file."""
+    files = []
+    for entry in BUILD_INPUTS:
+        path = os.path.join(project_root, entry)
+        if os.path.isfile(path):
+            files.append(entry)
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = [name for name in dirnames if name not in ("build", ".gradle")]
+            for filename in filenames:
+                files.append(os.path.relpath(os.path.join(dirpath, filename), project_root))
+    return sorted(files)
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def git_state(project_root: str) -> str:
+    """Describe the checked out commit, its tags and whether it is dirty."""
+    outputs = []
+    for command in (["git", "describe", "--tags", "--long", "--dirty", "--always"], ["git", "rev-parse", "HEAD"]):
+        try:
+            result = subprocess.run(command, cwd=project_root, capture_output=True, text=True)
+        except OSError:
+            return "no-git"
+        outputs.append(result.stdout.strip() if result.returncode == 0 else f"error {result.returncode}")
+    return " ".join(outputs)
+
+
+def gradle_user_properties() -> str:
+    """Return the path of the user-wide ``gradle.properties`` file.
+
+    The build falls back to the ``AndroidAutoIdrive_*`` properties defined
+    there when the matching environment variables are unset.
+    """
+    gradle_home = os.environ.get("GRADLE_USER_HOME") or os.path.join(os.path.expanduser("~"), ".gradle")
+    return os.path.join(gradle_home, "gradle.properties")
+
+
+def fingerprint_inputs(project_root: str, stat_cache_path: Optional[str] = None) -> str:
+    """Compute a content fingerprint of all build inputs.
+
+    Files whose size and mtime match the stat cache reuse their recorded
+    hash; the others are hashed in parallel and the stat cache is updated.
+
+    Args:
+        project_root: Path to the repository root.
+        stat_cache_path: Optional JSON file mapping paths to their size,
+            mtime and hash from a previous run.
+
+    Returns:
+        A hex SHA-256 digest over every input path, its contents, the git
+        state, the user's Gradle properties and the build-relevant
+        environment variables.
+    """
+    stat_cache: Dict[str, list] = {}
+    if stat_cache_path and os.path.exists(stat_cache_path):
+        try:
+            with open(stat_cache_path, encoding="utf-8") as f:
+                stat_cache = json.load(f)
+        except ValueError:
+            stat_cache = {}
+
+    hashes: Dict[str, str] = {}
+    stats: Dict[str, Tuple[int, int]] = {}
+    stale = []
+    for relpath in list_input_files(project_root):
+        st = os.stat(os.path.join(project_root, relpath))
+        stats[relpath] = (st.st_size, st.st_mtime_ns)
+        cached = stat_cache.get(relpath)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            hashes[relpath] = cached[2]
+        else:
+            stale.append(relpath)
+    if stale:
+        with ThreadPoolExecutor(max_workers=FINGERPRINT_WORKERS) as executor:
+            paths = [os.path.join(project_root, relpath) for relpath in stale]
+            hashes.update(zip(stale, executor.map(hash_file, paths)))
+
+    if stat_cache_path and (stale or len(stat_cache) != len(hashes)):
+        os.makedirs(os.path.dirname(stat_cache_path), exist_ok=True)
+        tmp_path = f"{stat_cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({relpath: [*stats[relpath], hashes[relpath]] for relpath in hashes}, f)
+        os.replace(tmp_path, stat_cache_path)
+
+    digest = hashlib.sha256()
+    for relpath in sorted(hashes):
+        digest.update(f"{relpath}\0{hashes[relpath]}\n".encode("utf-8"))
+    # versionCode, versionName and COMMIT_TIME are derived from git
+    digest.update(f"git:{git_state(project_root)}\n".encode("utf-8"))
+    user_properties = gradle_user_properties()
+    if os.path.isfile(user_properties):
+        digest.update(f"gradle.properties:{hash_file(user_properties)}\n".encode("utf-8"))
+    for name in sorted(os.environ):
+        if name.startswith(BUILD_ENV_PREFIXES) or name in BUILD_ENV_NAMES:
+            digest.update(f"env:{name}\0{os.environ[name]}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """Local content-addressed store of release APKs.
+
+    The outputs of a flavor are stored as ``<flavor>-<fingerprint>/``,
+    holding the ``<variant>/release`` directory of each of its variants,
+    so a build is only reused when every input is identical.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._fingerprint: Optional[str] = None
+
+    def fingerprint(self, project_root: str) -> str:
+        """Fingerprint the build inputs once per run."""
+        if self._fingerprint is None:
+            start = time.monotonic()
+            stat_cache_path = os.path.join(self.directory, "input_stats.json")
+            self._fingerprint = fingerprint_inputs(project_root, stat_cache_path)
+            print(f"Input fingerprint {self._fingerprint[:12]} computed in {time.monotonic() - start:.2f}s")
+        return self._fingerprint
+
+    def _path(self, project_root: str, flavor: str) -> str:
+        return os.path.join(self.directory, f"{flavor}-{self.fingerprint(project_root)}")
+
+    def restore(self, project_root: str, flavor: str) -> bool:
+        """Copy the cached variant outputs of ``flavor`` into the Gradle output directory.
+
+        Returns:
+            True if a matching build was found and restored.
+        """
+        cached = self._path(project_root, flavor)
+        if not os.path.isdir(cached):
+            return False
+        for variant in sorted(os.listdir(cached)):
+            target = os.path.join(apk_root(project_root), variant, "release")
+            shutil.rmtree(target, ignore_errors=True)
+            shutil.copytree(os.path.join(cached, variant, "release"), target)
+        print(f"Restored {flavor} APKs from artifact cache: {cached}")
+        return True
+
+    def store(self, project_root: str, flavor: str) -> None:
+        """Add the freshly built variant outputs of ``flavor`` to the cache."""
+        built = [path for path in variant_dirs(project_root, flavor) if glob.glob(os.path.join(path, "*.apk"))]
+        cached = self._path(project_root, flavor)
+        if not built or os.path.isdir(cached):
+            return
+        tmp_path = f"{cached}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        for path in built:
+            variant = os.path.basename(os.path.dirname(path))
+            shutil.copytree(path, os.path.join(tmp_path, variant, "release"))
+        try:
+            os.replace(tmp_path, cached)
+        except OSError:
+            # Another build stored the same fingerprint in the meantime
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def parse_duration(text: str) -> Optional[float]:
+    """Convert a Gradle profile duration such as ``1m2.34s`` to seconds."""
+    match = DURATION_RE.match(text.strip())
+    if not match or not any(match.groups()):
+        return None
+    days, hours, minutes, seconds = (float(group or 0) for group in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+class _ProfileTableParser(HTMLParser):
+    """Collect the cell texts of every table row in a Gradle profile report."""
+
+    def __init__(self):
+        super().__init__()
+        self.rows: List[List[str]] = []
+        self._row: Optional[List[str]] = None
+        self._cell: Optional[List[str]] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            self._row = []
+        elif tag == "td" and self._row is not None:
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if tag == "td" and self._cell is not None:
+            self._row.append("".join(self._cell).strip())
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            self.rows.append(self._row)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def parse_profile_report(path: str) -> Dict[str, float]:
+    """Extract the per-task durations from a Gradle ``--profile`` report.
+
+    Task rows have a path, a duration and an outcome column; project
+    summary rows (outcome "(total)") and configuration rows are skipped.
+
+    Returns:
+        A mapping from task path (e.g. ``:app:compileSentryReleaseKotlin``)
+        to its duration in seconds.
+    """
+    parser = _ProfileTableParser()
+    with open(path, encoding="utf-8") as f:
+        parser.feed(f.read())
+    tasks: Dict[str, float] = {}
+    for row in parser.rows:
+        if len(row) < 3 or not row[0].startswith(":") or row[2] == "(total)":
+            continue
+        seconds = parse_duration(row[1])
+        if seconds is not None:
+            tasks[row[0]] = seconds
+    return tasks
+
+
+def find_profile_report(project_root: str, since: float) -> Optional[str]:
+    """Return the newest Gradle profile report written after ``since``."""
+    reports = [
+        path
+        for path in glob.glob(os.path.join(project_root, "build", "reports", "profile", "profile-*.html"))
+        if os.path.getmtime(path) >= since
+    ]
+    return max(reports, key=os.path.getmtime) if reports else None
+
+
+def load_history(path: str) -> List[dict]:
+    """Read all entries of a build history file, skipping corrupt lines."""
+    entries = []
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+    return entries
+
+
+def detect_regressions(previous: List[dict], entry: dict, threshold: float, window: int) -> List[str]:
+    """Compare a build against the rolling baseline of matching builds.
+
+    The baseline of each task (and of the wall-clock time) is the median of
+    the last ``window`` builds with the same mode and flavors.
+
+    Returns:
+        Human readable descriptions of every regression found.
+    """
+    matching = [e for e in previous if e.get("mode") == entry["mode"] and e.get("flavors") == entry["flavors"]]
+    recent = matching[-window:]
+    if not recent:
+        return []
+    regressions = []
+    measurements = [("total wall time", entry["wall_time"], [e["wall_time"] for e in recent])]
+    for task, seconds in entry["tasks"].items():
+        measurements.append((task, seconds, [e["tasks"][task] for e in recent if task in e.get("tasks", {})]))
+    for name, seconds, samples in measurements:
+        if not samples:
+            continue
+        baseline = statistics.median(samples)
+        if seconds >= MIN_REGRESSION_SECONDS and seconds > baseline * (1 + threshold):
+            regressions.append(f"{name}: {seconds:.1f}s vs. baseline {baseline:.1f}s (+{seconds - baseline:.1f}s)")
+    return regressions
+
+
+def apk_size_changes(previous: List[dict], entry: dict) -> List[str]:
+    """Describe how each variant's APK size changed since it was last recorded."""
+    changes = []
+    for variant, size in entry["apk_sizes"].items():
+        last = next((e["apk_sizes"][variant] for e in reversed(previous) if variant in e.get("apk_sizes", {})), None)
+        if last is not None and last != size:
+            changes.append(f"{variant}: {last} -> {size} bytes ({size - last:+d}, {(size - last) / last:+.1%})")
+    return changes
+
+
+def record_build(history: HistorySettings, entry: dict) -> None:
+    """Report regressions and APK size changes, then append the build."""
+    previous = load_history(history.path)
+    for regression in detect_regressions(previous, entry, history.threshold, history.window):
+        print(f"Warning: build time regression in {regression}")
+    for change in apk_size_changes(previous, entry):
+        print(f"APK size changed for {change}")
+    with open(history.path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, sort_keys=True) + "\n")
+
+
+def profile_invocation(
+    project_root: str,
+    flavors: List[str],
+    combined: bool,
+    history: Optional[HistorySettings],
+) -> float:
+    """Run one Gradle invocation and record its profile in the history.
+
+    Returns:
+        The wall-clock time of the invocation in seconds.
+    """
+    gradle_args = ["--profile"] if history else []
+    started_at = time.time()
+    start = time.monotonic()
+    if combined:
+        build_variants_combined(project_root, flavors, gradle_args)
+    else:
+        build_variant(project_root, flavors[0], gradle_args)
+    wall_time = time.monotonic() - start
+
+    if history:
+        report = find_profile_report(project_root, started_at)
+        if report is None:
+            print("Warning: no Gradle profile report found, task durations not recorded")
+        apk_sizes = variant_apk_sizes(project_root, flavors)
+        record_build(history, {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "mode": "combined" if combined else "sequential",
+            "flavors": flavors,
+            "wall_time": round(wall_time, 3),
+            "tasks": parse_profile_report(report) if report else {},
+            "apk_sizes": apk_sizes,
+        })
+    return wall_time
+
+
+def run_build(
+    project_root: str,
+    flavors: List[str],
+    combined: bool,
+    clean: str,
+    history: Optional[HistorySettings] = None,
+    artifacts: Optional[ArtifactCache] = None,
+) -> float:
+    """Clean as requested, assemble the flavors and return the wall-clock time.
+
+    Args:
+        project_root: Path to the repository root where `gradlew` resides.
+        flavors: The build flavors to assemble.
+        combined: Use a single Gradle invocation for all flavors.
+        clean: "full" for `./gradlew clean`, "outputs" for
+            :func:`clean_outputs`, or "none".
+        history: Where and how to record build profiles, or None.
+        artifacts: Cache to restore unchanged flavors from, or None.
+    """
+    start = time.monotonic()
+    if artifacts:
+        # Fingerprint before cleaning so the result cannot depend on it
+        artifacts.fingerprint(project_root)
+    if clean == "full":
+        run_command(["./gradlew", "clean"], cwd=project_root)
+    elif clean == "outputs":
+        clean_outputs(project_root, flavors)
+
+    if artifacts:
+        flavors = [flavor for flavor in flavors if not artifacts.restore(project_root, flavor)]
+        if not flavors:
+            return time.monotonic() - start
+
+    if combined:
+        plural = "s" if len(flavors) > 1 else ""
+        print(f"\nAssembling {', '.join(flavors)} release variant{plural} in one invocation...")
+        profile_invocation(project_root, flavors, True, history)
     else:
-        print(f"Warning: expected APK not found at {apk_path}")
+        for flavor in flavors:
+            print(f"\nAssembling {flavor} release variant...")
+            seconds = profile_invocation(project_root, [flavor], False, history)
+            print(f"Assembled {flavor} in {seconds:.1f}s")
+    if artifacts:
+        for flavor in flavors:
+            artifacts.store(project_root, flavor)
+    return time.monotonic() - start
+
+
+def print_timings(timings: Dict[str, float]) -> None:
+    """Print the wall-clock time of each build mode."""
+    print("\nWall-clock time:")
+    fastest = min(timings.values())
+    for mode, seconds in timings.items():
+        ratio = f" ({seconds / fastest:.2f}x)" if fastest > 0 and len(timings) > 1 else ""
+        print(f"  {mode:<10} {seconds:8.1f}s{ratio}")
 
 
 def parse_args(argv: list) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Build AAIdrive release variants")
-    parser.add_argument(
+    clean_group = parser.add_mutually_exclusive_group()
+    clean_group.add_argument(
         "--clean",
         action="store_true",
         help="Perform a clean build before assembling the APKs",
     )
+    clean_group.add_argument(
+        "--clean-outputs",
+        action="store_true",
+        help="Only delete the APK outputs of the selected flavors before building",
+    )
     parser.add_argument(
         "--flavor",
         choices=["sentry", "nonalytics", "all"],
         default="all",
         help="Select which flavor to build",
     )
-    return parser.parse_args(argv)
+    parser.add_argument(
+        "--combined",
+        action="store_true",
+        help="Assemble all flavors in one parallel Gradle invocation with the build cache",
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Build sequentially and combined, and compare their wall-clock times (requires --clean)",
+    )
+    parser.add_argument(
+        "--no-history",
+        action="store_true",
+        help="Do not profile the build or record it in the build history",
+    )
+    parser.add_argument(
+        "--history",
+        help=f"Build history file (default: {DEFAULT_HISTORY_FILE} in the repository root)",
+    )
+    parser.add_argument(
+        "--regression-threshold",
+        type=float,
+        default=DEFAULT_REGRESSION_THRESHOLD,
+        help="Relative slowdown over the rolling baseline that counts as a regression (default: 0.25)",
+    )
+    parser.add_argument(
+        "--no-artifact-cache",
+        action="store_true",
+        help="Always run Gradle instead of restoring APKs built from identical inputs",
+    )
+    parser.add_argument(
+        "--artifact-cache",
+        default=DEFAULT_ARTIFACT_CACHE,
+        help=f"Directory of the local APK cache (default: {DEFAULT_ARTIFACT_CACHE})",
+    )
+    args = parser.parse_args(argv)
+    if args.compare and not args.clean:
+        # Otherwise the second mode reuses the first one's incremental state
+        parser.error("--compare requires --clean so both builds start from the same state")
+    return args
 
 
 def main(argv: list) -> None:
     args = parse_args(argv)
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 
-    if args.clean:
-        run_command(["./gradlew", "clean"], cwd=project_root)
-
+    clean = "full" if args.clean else "outputs" if args.clean_outputs else "none"
     flavors = ["sentry", "nonalytics"] if args.flavor == "all" else [args.flavor]
-    for flavor in flavors:
-        print(f"\nAssembling {flavor} release variant...")
-        build_variant(project_root, flavor)
+
+    if args.compare:
+        modes = {"sequential": False, "combined": True}
+    else:
+        modes = {"combined" if args.combined else "sequential": args.combined}
+    history = None
+    if not args.no_history:
+        history_path = args.history or os.path.join(project_root, DEFAULT_HISTORY_FILE)
+        history = HistorySettings(history_path, args.regression_threshold)
+    artifacts = None
+    # A clean build is an explicit request for a real Gradle build
+    if not args.no_artifact_cache and not args.compare and not args.clean:
+        artifacts = ArtifactCache(args.artifact_cache)
+    timings = {}
+    for mode, combined in modes.items():
+        timings[mode] = run_build(project_root, flavors, combined, clean, history, artifacts)
+    print_timings(timings)
 
     print("\nBuild process completed.")
 
@@ -18,15 +18,28 @@ Usage:
        --since v1.4.2 --until v1.4.3
 
 If `--since` is omitted, the script uses the previous tag chronologically
-before `--until`. If `--until` is omitted, the script uses the current
-HEAD of the default branch.
+before `--until`, looked up in the local checkout. If there is no such
+tag, for example in a shallow CI checkout, only the latest page of GitHub
+commits is listed and a warning is printed. If `--until` is omitted, the
+script uses the current HEAD of the default branch.
+
+With `--source git` the commits are read from the local checkout instead,
+which needs no token or network access:
+
+    python generate_release_notes.py --source git --until v1.4.3
 """
 
 import argparse
 import datetime
+import hashlib
+import json
 import os
+import subprocess
 import sys
-from typing import List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
 
 try:
     import requests  # type: ignore
@@ -34,39 +47,208 @@ except ImportError:
     requests = None  # type: ignore
 
 
-GITHUB_API = "https://api.github.com"
+GITHUB_API = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+
+# Largest page size GitHub accepts for commit listings.
+PER_PAGE = 100
+DEFAULT_WORKERS = 8
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "aaidrive-release-notes")
+
+# Field and record separators for the machine-readable `git log` format.
+GIT_FIELD_SEP = "\x1f"
+GIT_RECORD_SEP = "\x1e"
+GIT_LOG_FORMAT = "%H%x1f%an%x1f%at%x1f%B%x1e"
 
 
+class ResponseCache:
+    """On-disk cache of GitHub API responses keyed by URL.
+
+    Each entry stores the response body, its pagination links and the
+    ``ETag`` header, so later runs can revalidate with ``If-None-Match``.
+    A ``304 Not Modified`` reply does not count against the rate limit.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
 
-def get_commits(repo: str, since: Optional[str], until: Optional[str], token: Optional[str]) -> List[dict]:
+    def _path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url: str) -> Optional[dict]:
+        try:
+            with open(self._path(url), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, etag: str, body: Any, links: Dict[str, str]) -> None:
+        path = self._path(url)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"url": url, "etag": etag, "body": body, "links": links}, f)
+        os.replace(tmp_path, path)
+
+
+def create_session(token: Optional[str], pool_size: int = DEFAULT_WORKERS) -> "requests.Session":
+    """Create a pooled session carrying the GitHub API headers."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept"] = "application/vnd.github.v3+json"
+    if token:
+        session.headers["Authorization"] = f"token {token}"
+    return session
+
+
+def fetch_json(session: "requests.Session", url: str, cache: Optional[ResponseCache]) -> Tuple[Any, Dict[str, str]]:
+    """GET a JSON document, revalidating any cached copy by ETag.
+
+    Returns:
+        The decoded body and a mapping of pagination link relations to URLs.
+    """
+    entry = cache.get(url) if cache else None
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    resp = session.get(url, headers=headers, timeout=30)
+    if resp.status_code == 304 and entry:
+        return entry["body"], entry["links"]
+    resp.raise_for_status()
+    body = resp.json()
+    links = {rel: link["url"] for rel, link in resp.links.items()}
+    etag = resp.headers.get("ETag")
+    if cache and etag:
+        cache.put(url, etag, body, links)
+    return body, links
+
+
+def page_url(base_url: str, params: Dict[str, Any], page: int) -> str:
+    return f"{base_url}?{urlencode({**params, 'per_page': PER_PAGE, 'page': page})}"
+
+
+def get_commits(
+    repo: str,
+    since: Optional[str],
+    until: Optional[str],
+    token: Optional[str],
+    cache_dir: Optional[str] = None,
+    workers: int = DEFAULT_WORKERS,
+    api: str = GITHUB_API,
+    cwd: str = ".",
+) -> List[dict]:
     """Fetch the list of commits between two references.
 
+    If ``since`` is omitted, the tag before ``until`` is looked up in the
+    local checkout. The first page of the comparison is fetched to learn
+    how many pages there are, then the remaining pages are fetched
+    concurrently over one pooled session. Without any previous tag only
+    the latest page of commits is returned.
+
     Args:
         repo: Repository in the form "owner/repo".
         since: Tag or SHA to start from (exclusive).
         until: Tag or SHA to end at (inclusive).
         token: Optional GitHub API token.
+        cache_dir: Optional directory for the ETag response cache.
+        workers: Number of pages fetched in parallel.
+        api: Base URL of the GitHub API.
+        cwd: Path inside the local git checkout used to find the previous tag.
 
     Returns:
         A list of commit dictionaries.
     """
     if requests is None:
         raise RuntimeError("The requests library is required to use this script.")
-    headers = {"Accept": "application/vnd.github.v3+json"}
-    if token:
-        headers["Authorization"] = f"token {token}"
-    url = f"{GITHUB_API}/repos/{repo}/compare/{since}...{until}" if since else f"{GITHUB_API}/repos/{repo}/commits"
-    params = {}
-    if since is None and until:
-        params["sha"] = until
-    commits: List[dict] = []
-    resp = requests.get(url, headers=headers, params=params, timeout=30)
-    resp.raise_for_status()
-    data = resp.json()
-    if since:
+    cache = ResponseCache(cache_dir) if cache_dir else None
+    if since is None:
+        since = resolve_previous_tag(until, cwd)
+
+    with create_session(token, workers) as session:
+        if since is None:
+            print(
+                f"Warning: no tag found before {until or 'HEAD'}; listing only the latest "
+                f"{PER_PAGE} commits. Pass --since or fetch the tags.",
+                file=sys.stderr,
+            )
+            params = {"sha": until} if until else {}
+            data, _ = fetch_json(session, page_url(f"{api}/repos/{repo}/commits", params, 1), cache)
+            return data
+
+        base_url = f"{api}/repos/{repo}/compare/{since}...{until or 'HEAD'}"
+        data, _ = fetch_json(session, page_url(base_url, {}, 1), cache)
         commits = data.get("commits", [])
-    else:
-        commits = data
+        last_page = -(-data.get("total_commits", 0) // PER_PAGE)
+        if last_page > 1:
+            urls = [page_url(base_url, {}, page) for page in range(2, last_page + 1)]
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for data, _ in executor.map(lambda url: fetch_json(session, url, cache), urls):
+                    commits.extend(data.get("commits", []))
+    return commits
+
+
+def run_git(args: List[str], cwd: str) -> str:
+    """Run a git command in ``cwd`` and return its stripped stdout."""
+    result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+    return result.stdout.strip()
+
+
+def resolve_previous_tag(until: Optional[str], cwd: str) -> Optional[str]:
+    """Return the closest tag reachable from before ``until``, if any.
+
+    Args:
+        until: Tag or SHA the release ends at (defaults to HEAD).
+        cwd: Path inside the local git checkout.
+    """
+    try:
+        return run_git(["describe", "--tags", "--abbrev=0", f"{until or 'HEAD'}^"], cwd)
+    except (RuntimeError, OSError):
+        # Not a checkout, a root commit or no earlier tag: the release covers all history
+        return None
+
+
+def get_local_commits(since: Optional[str], until: Optional[str], cwd: str = ".") -> List[dict]:
+    """Read the commits between two references from the local checkout.
+
+    The commits are returned oldest first in the same shape as the GitHub
+    API, so they can be passed to :func:`format_release_notes` unchanged.
+
+    Args:
+        since: Tag or SHA to start from (exclusive). Defaults to the tag
+            before ``until``.
+        until: Tag or SHA to end at (inclusive). Defaults to HEAD.
+        cwd: Path inside the local git checkout.
+
+    Returns:
+        A list of commit dictionaries.
+    """
+    until = until or "HEAD"
+    if since is None:
+        since = resolve_previous_tag(until, cwd)
+    revision = f"{since}..{until}" if since else until
+    command = ["git", "log", "--reverse", f"--format={GIT_LOG_FORMAT}", revision, "--"]
+    process = subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8")
+    commits: List[dict] = []
+    pending = ""
+    for chunk in iter(lambda: process.stdout.read(65536), ""):
+        records = (pending + chunk).split(GIT_RECORD_SEP)
+        pending = records.pop()
+        for record in records:
+            sha, author, timestamp, message = record.lstrip("\n").split(GIT_FIELD_SEP, 3)
+            date = datetime.datetime.fromtimestamp(int(timestamp), tz=datetime.timezone.utc)
+            commits.append({
+                "sha": sha,
+                "commit": {
+                    "message": message.strip(),
+                    "author": {"name": author, "date": date.strftime("%Y-%m-%dT%H:%M:%SZ")},
+                },
+            })
+    stderr = process.stderr.read()
+    if process.wait() != 0:
+        raise RuntimeError(f"git log {revision} failed: {stderr.strip()}")
     return commits
 
 
@@ -89,20 +271,50 @@ def format_release_notes(commits: List[dict]) -> str:
 
 def parse_args(argv: List[str]) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Generate release notes from GitHub commits")
-    parser.add_argument("--repo", required=True, help="Repository in the form owner/repo")
+    parser.add_argument("--repo", help="Repository in the form owner/repo (required for --source github)")
     parser.add_argument("--since", help="Start tag or commit (exclusive)")
     parser.add_argument("--until", help="End tag or commit (inclusive)")
-    return parser.parse_args(argv)
+    parser.add_argument(
+        "--source",
+        choices=["github", "git"],
+        default="github",
+        help="Read commits from the GitHub API or from the local git checkout",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory for cached GitHub API responses (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the GitHub API response cache")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Number of pages fetched concurrently (default: {DEFAULT_WORKERS})",
+    )
+    args = parser.parse_args(argv)
+    if args.source == "github" and not args.repo:
+        parser.error("--repo is required when --source is github")
+    return args
 
 
 def main(argv: List[str]) -> None:
     args = parse_args(argv)
+    if args.source == "git":
+        try:
+            commits = get_local_commits(args.since, args.until)
+        except Exception as e:
+            print(f"Failed to read commits: {e}")
+            sys.exit(1)
+        print(format_release_notes(commits))
+        return
     token = os.environ.get("GITHUB_TOKEN")
     if requests is None:
         print("Error: The requests library is not installed. Please install requests to use this script.")
         sys.exit(1)
     try:
-        commits = get_commits(args.repo, args.since, args.until, token)
+        cache_dir = None if args.no_cache else args.cache_dir
+        commits = get_commits(args.repo, args.since, args.until, token, cache_dir, args.workers)
     except Exception as e:
         print(f"Failed to fetch commits: {e}")
         sys.exit(1)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The automation scripts are standalone modules, not a package.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
@@ -0,0 +1,41 @@
+import pytest
+
+from benchmark import compare, time_limit
+
+
+def result(*samples, peak_bytes=1000):
+    seconds = sorted(samples)[len(samples) // 2]
+    return {"seconds": seconds, "samples": list(samples), "throughput": 100 / seconds, "peak_bytes": peak_bytes}
+
+
+BASELINE = {"format_number[100]": result(0.010, 0.011, 0.012, 0.013, 0.015)}
+
+
+def test_time_limit_adds_baseline_spread():
+    # Median 12 ms plus 25% plus the 3 ms to the slowest baseline sample
+    assert time_limit(BASELINE["format_number[100]"], 0.25) == pytest.approx(0.018)
+    assert time_limit({"seconds": 0.012}, 0.25) == pytest.approx(0.015)
+
+
+def test_noisy_samples_are_not_regressions():
+    # Most samples were slowed down by load, but the fastest one is fine
+    noisy = {"format_number[100]": result(0.014, 0.019, 0.022, 0.025, 0.030)}
+    assert compare(noisy, BASELINE, 0.25) == []
+
+
+def test_consistently_slower_is_regression():
+    slower = {"format_number[100]": result(0.019, 0.020, 0.020, 0.021, 0.022)}
+    failures = compare(slower, BASELINE, 0.25)
+    assert len(failures) == 1
+    assert failures[0].startswith("format_number[100]: fastest run took 19.000 ms, above the limit of 18.000 ms")
+
+
+def test_peak_memory_growth_is_regression():
+    grown = {"format_number[100]": result(0.012, peak_bytes=1300)}
+    assert compare(grown, BASELINE, 0.25) == [
+        "format_number[100]: peak memory 1,300 B exceeds baseline 1,000 B"
+    ]
+
+
+def test_benchmarks_missing_from_baseline_are_skipped():
+    assert compare({"validate_locale[100]": result(1.0)}, BASELINE, 0.25) == []
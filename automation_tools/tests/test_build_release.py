@@ -0,0 +1,261 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import build_release
+
+
+@pytest.fixture
+def commands(monkeypatch):
+    """Record Gradle commands instead of running them."""
+    recorded = []
+    monkeypatch.setattr(build_release, "run_command", lambda command, cwd: recorded.append(command))
+    return recorded
+
+
+def test_sequential_build(tmp_path, commands):
+    build_release.run_build(str(tmp_path), ["sentry", "nonalytics"], False, "full")
+    assert commands == [
+        ["./gradlew", "clean"],
+        ["./gradlew", "assembleSentryRelease"],
+        ["./gradlew", "assembleNonalyticsRelease"],
+    ]
+
+
+def test_combined_build(tmp_path, commands):
+    build_release.run_build(str(tmp_path), ["sentry", "nonalytics"], True, "none")
+    assert commands == [
+        ["./gradlew", "--parallel", "--build-cache", "assembleSentryRelease", "assembleNonalyticsRelease"],
+    ]
+
+
+# Output directories of the map x analytics x storefront flavor dimensions
+VARIANTS = ["nomapSentryFull", "mapboxSentryFull", "nomapNonalyticsFull", "mapboxNonalyticsPlay"]
+
+
+def write_apks(root, variants, content=b"apk"):
+    """Create APKs where Gradle writes them for the given variants."""
+    for variant in variants:
+        release = root / "app" / "build" / "outputs" / "apk" / variant / "release"
+        release.mkdir(parents=True, exist_ok=True)
+        (release / "androidautoidrive-1.0-release.apk").write_bytes(content)
+        (release / "output-metadata.json").write_text("{}")
+
+
+def test_variant_apks_match_flavor_dimension(tmp_path):
+    write_apks(tmp_path, VARIANTS)
+    apks = build_release.variant_apks(str(tmp_path), "sentry")
+    assert [os.path.relpath(apk, tmp_path) for apk in apks] == [
+        "app/build/outputs/apk/mapboxSentryFull/release/androidautoidrive-1.0-release.apk",
+        "app/build/outputs/apk/nomapSentryFull/release/androidautoidrive-1.0-release.apk",
+    ]
+
+
+def test_clean_outputs_only_removes_selected_apks(tmp_path, commands):
+    write_apks(tmp_path, VARIANTS)
+    build_release.run_build(str(tmp_path), ["sentry"], True, "outputs")
+    assert commands == [["./gradlew", "--parallel", "--build-cache", "assembleSentryRelease"]]
+    remaining = sorted(os.listdir(build_release.apk_root(str(tmp_path))))
+    assert remaining == ["mapboxNonalyticsPlay", "mapboxSentryFull", "nomapNonalyticsFull", "nomapSentryFull"]
+    assert build_release.variant_apks(str(tmp_path), "sentry") == []
+    assert len(build_release.variant_apks(str(tmp_path), "nonalytics")) == 2
+
+
+def test_compare_builds_both_modes(commands, capsys):
+    build_release.main(["--compare", "--clean", "--no-history"])
+    assert commands == [
+        ["./gradlew", "clean"],
+        ["./gradlew", "assembleSentryRelease"],
+        ["./gradlew", "assembleNonalyticsRelease"],
+        ["./gradlew", "clean"],
+        ["./gradlew", "--parallel", "--build-cache", "assembleSentryRelease", "assembleNonalyticsRelease"],
+    ]
+    output = capsys.readouterr().out
+    assert "sequential" in output and "combined" in output
+
+
+@pytest.mark.parametrize("argv", [["--compare"], ["--compare", "--clean-outputs"]])
+def test_compare_requires_clean(argv):
+    with pytest.raises(SystemExit):
+        build_release.parse_args(argv)
+
+
+def git(cwd, *args):
+    env = {**os.environ, "GIT_AUTHOR_NAME": "t", "GIT_AUTHOR_EMAIL": "t@t", "GIT_COMMITTER_NAME": "t", "GIT_COMMITTER_EMAIL": "t@t"}
+    subprocess.run(["git", *args], cwd=cwd, env=env, check=True, capture_output=True)
+
+
+@pytest.fixture
+def project(tmp_path, tmp_path_factory, monkeypatch):
+    monkeypatch.setenv("GRADLE_USER_HOME", str(tmp_path_factory.mktemp("gradle")))
+    (tmp_path / "app" / "src").mkdir(parents=True)
+    (tmp_path / "app" / "src" / "Main.kt").write_text("fun main() {}")
+    (tmp_path / "keystore.jks").write_bytes(b"key")
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "add", "-A")
+    git(tmp_path, "commit", "-qm", "initial")
+    return tmp_path
+
+
+def test_fingerprint_tracks_git_state(project):
+    before = build_release.fingerprint_inputs(str(project))
+    git(project, "tag", "v1.0")
+    tagged = build_release.fingerprint_inputs(str(project))
+    (project / "README.md").write_text("docs")
+    git(project, "add", "README.md")
+    git(project, "commit", "-qm", "docs only")
+    assert len({before, tagged, build_release.fingerprint_inputs(str(project))}) == 3
+
+
+def test_fingerprint_tracks_keystore(project, tmp_path_factory):
+    stat_cache = str(tmp_path_factory.mktemp("cache") / "stats.json")
+    before = build_release.fingerprint_inputs(str(project), stat_cache)
+    (project / "keystore.jks").write_bytes(b"another key")
+    assert build_release.fingerprint_inputs(str(project), stat_cache) != before
+
+
+def test_fingerprint_tracks_gradle_user_properties(project):
+    before = build_release.fingerprint_inputs(str(project))
+    properties = os.path.join(os.environ["GRADLE_USER_HOME"], "gradle.properties")
+    with open(properties, "w") as f:
+        f.write("AndroidAutoIdrive_SpotifyApiKey=invalid\n")
+    unset = build_release.fingerprint_inputs(str(project))
+    with open(properties, "w") as f:
+        f.write("AndroidAutoIdrive_SpotifyApiKey=0123456789abcdef\n")
+    assert len({before, unset, build_release.fingerprint_inputs(str(project))}) == 3
+
+
+def test_artifact_cache_restores_unchanged_flavor(project, commands, tmp_path_factory, monkeypatch):
+    cache = tmp_path_factory.mktemp("apks")
+
+    def build(command, cwd):
+        commands.append(command)
+        write_apks(project, VARIANTS)
+    monkeypatch.setattr(build_release, "run_command", build)
+    build_release.run_build(str(project), ["sentry"], False, "none", None, build_release.ArtifactCache(str(cache)))
+    shutil.rmtree(build_release.apk_root(str(project)))
+    build_release.run_build(str(project), ["sentry"], False, "outputs", None, build_release.ArtifactCache(str(cache)))
+    assert commands == [["./gradlew", "assembleSentryRelease"]]
+    restored = [os.path.relpath(apk, project) for apk in build_release.variant_apks(str(project), "sentry")]
+    assert restored == [
+        os.path.join("app", "build", "outputs", "apk", variant, "release", "androidautoidrive-1.0-release.apk")
+        for variant in ("mapboxSentryFull", "nomapSentryFull")
+    ]
+    assert os.path.exists(os.path.join(build_release.apk_root(str(project)), "nomapSentryFull", "release", "output-metadata.json"))
+    assert build_release.variant_apks(str(project), "nonalytics") == []
+
+
+def test_clean_skips_artifact_cache(commands, monkeypatch):
+    def fail(*args):
+        raise AssertionError("artifact cache used for a clean build")
+    monkeypatch.setattr(build_release.ArtifactCache, "restore", fail)
+    build_release.main(["--clean", "--flavor", "sentry", "--no-history"])
+    assert commands == [["./gradlew", "clean"], ["./gradlew", "assembleSentryRelease"]]
+
+
+PROFILE_REPORT = """<html><body>
+<div id="tabs">
+<h2>Configuration</h2>
+<table>
+<tr><th>Project</th><th class="numeric">Duration</th></tr>
+<tr><td>All projects</td><td class="numeric">2.81s</td></tr>
+<tr><td>:app</td><td class="numeric">2.1s</td></tr>
+</table>
+<h2>Task Execution</h2>
+<table>
+<tr><th>Task</th><th class="numeric">Duration</th><th>Result</th></tr>
+<tr><td>:app</td><td class="numeric">1h1m4.0s</td><td>(total)</td></tr>
+<tr>
+<td>:app:compileNomapSentryFullReleaseKotlin</td><td class="numeric">1m2.34s</td><td>Did work</td>
+</tr>
+<tr><td>:app:minifyNomapSentryFullReleaseWithR8</td><td class="numeric">1h0m1.5s</td><td>Did work</td></tr>
+<tr><td>:app:preBuild</td><td class="numeric">0s</td><td>UP-TO-DATE</td></tr>
+</table>
+</div>
+</body></html>
+"""
+
+
+@pytest.mark.parametrize("text, seconds", [
+    ("0.123s", 0.123),
+    ("1m2.34s", 62.34),
+    ("1h0m1.5s", 3601.5),
+    ("1d2h", 93600.0),
+    ("-", None),
+    ("", None),
+])
+def test_parse_duration(text, seconds):
+    if seconds is None:
+        assert build_release.parse_duration(text) is None
+    else:
+        assert build_release.parse_duration(text) == pytest.approx(seconds)
+
+
+def test_parse_profile_report(tmp_path):
+    report = tmp_path / "profile-2024-01-01-12-00-00.html"
+    report.write_text(PROFILE_REPORT)
+    assert build_release.parse_profile_report(str(report)) == {
+        ":app:compileNomapSentryFullReleaseKotlin": pytest.approx(62.34),
+        ":app:minifyNomapSentryFullReleaseWithR8": pytest.approx(3601.5),
+        ":app:preBuild": 0.0,
+    }
+
+
+def history_entry(wall_time, tasks, apk_sizes=None, mode="sequential", flavors=("sentry",)):
+    return {"mode": mode, "flavors": list(flavors), "wall_time": wall_time, "tasks": tasks, "apk_sizes": apk_sizes or {}}
+
+
+def test_regression_against_rolling_median():
+    # The outlier in the oldest build falls out of the window of 3
+    previous = [history_entry(100, {":app:lint": 90.0})] + [
+        history_entry(100, {":app:lint": seconds}) for seconds in (10.0, 11.0, 30.0)
+    ]
+    entry = history_entry(110, {":app:lint": 14.0})
+    regressions = build_release.detect_regressions(previous, entry, 0.25, 3)
+    assert regressions == [":app:lint: 14.0s vs. baseline 11.0s (+3.0s)"]
+    assert build_release.detect_regressions(previous, history_entry(110, {":app:lint": 13.0}), 0.25, 3) == []
+
+
+def test_regression_ignores_fast_tasks_and_other_builds():
+    previous = [history_entry(100, {":app:preBuild": 0.1})] * 3
+    entry = history_entry(100, {":app:preBuild": 0.9})
+    assert build_release.detect_regressions(previous, entry, 0.25, 5) == []
+    combined = history_entry(300, {":app:preBuild": 5.0}, mode="combined")
+    assert build_release.detect_regressions(previous, combined, 0.25, 5) == []
+
+
+def test_apk_size_changes_per_variant():
+    previous = [
+        history_entry(1, {}, {"nomapSentryFull": 1000, "mapboxSentryFull": 2000}),
+        history_entry(1, {}, {"nomapSentryFull": 1100}),
+    ]
+    entry = history_entry(1, {}, {"nomapSentryFull": 1210, "mapboxSentryFull": 2000, "nomapSentryPlay": 10})
+    assert build_release.apk_size_changes(previous, entry) == ["nomapSentryFull: 1100 -> 1210 bytes (+110, +10.0%)"]
+
+
+def test_record_build_reports_and_appends(tmp_path, capsys):
+    history = build_release.HistorySettings(str(tmp_path / "history.jsonl"))
+    for seconds in (10.0, 10.0):
+        build_release.record_build(history, history_entry(20, {":app:lint": seconds}, {"nomapSentryFull": 100}))
+    build_release.record_build(history, history_entry(20, {":app:lint": 20.0}, {"nomapSentryFull": 150}))
+    output = capsys.readouterr().out
+    assert "Warning: build time regression in :app:lint: 20.0s vs. baseline 10.0s" in output
+    assert "APK size changed for nomapSentryFull: 100 -> 150 bytes" in output
+    assert len(build_release.load_history(history.path)) == 3
+
+
+def test_profiled_build_records_tasks_and_apk_sizes(tmp_path, monkeypatch):
+    def gradle(command, cwd):
+        assert "--profile" in command
+        reports = tmp_path / "build" / "reports" / "profile"
+        reports.mkdir(parents=True, exist_ok=True)
+        (reports / "profile-2024-01-01-12-00-00.html").write_text(PROFILE_REPORT)
+        write_apks(tmp_path, ["nomapSentryFull", "mapboxSentryFull"], b"x" * 100)
+    monkeypatch.setattr(build_release, "run_command", gradle)
+    history = build_release.HistorySettings(str(tmp_path / "history.jsonl"))
+    build_release.run_build(str(tmp_path), ["sentry"], False, "none", history)
+    entry, = build_release.load_history(history.path)
+    assert entry["apk_sizes"] == {"mapboxSentryFull": 100, "nomapSentryFull": 100}
+    assert entry["tasks"][":app:compileNomapSentryFullReleaseKotlin"] == pytest.approx(62.34)
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import generate_release_notes
+from generate_release_notes import format_release_notes, get_commits, get_local_commits, resolve_previous_tag
+
+
+TOTAL_COMMITS = 250
+COMMITS = [
+    {
+        "sha": f"{i:040x}",
+        "commit": {"message": f"Change {i}\n\nDetails", "author": {"name": "Dev", "date": "2024-03-01T10:00:00Z"}},
+    }
+    for i in range(TOTAL_COMMITS)
+]
+
+
+class StandInAPI(BaseHTTPRequestHandler):
+    """Serves paged compare and commits listings with ETags, like GitHub."""
+
+    requests_seen = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        per_page = int(query.get("per_page", ["30"])[0])
+        page = int(query.get("page", ["1"])[0])
+        window = slice((page - 1) * per_page, page * per_page)
+        headers = {}
+        if "/compare/" in url.path:
+            body = {"total_commits": TOTAL_COMMITS, "commits": COMMITS[window]}
+        else:
+            body = list(reversed(COMMITS))[window]
+            last = -(-TOTAL_COMMITS // per_page)
+            headers["Link"] = f'<http://{self.headers["Host"]}{url.path}?per_page={per_page}&page={last}>; rel="last"'
+        payload = json.dumps(body).encode("utf-8")
+        etag = f'"{hashlib.sha256(payload).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.requests_seen.append((url.path, page, 304))
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.requests_seen.append((url.path, page, 200))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("ETag", etag)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def api():
+    pytest.importorskip("requests")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInAPI)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    StandInAPI.requests_seen = []
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_compare_is_fully_paginated(api):
+    commits = get_commits("o/r", "v1", "v2", None, api=api)
+    assert [c["sha"] for c in commits] == [c["sha"] for c in COMMITS]
+    assert sorted(page for _, page, _ in StandInAPI.requests_seen) == [1, 2, 3]
+
+
+def test_unchanged_range_only_costs_304s(api, tmp_path):
+    first = get_commits("o/r", "v1", "v2", None, cache_dir=str(tmp_path), api=api)
+    StandInAPI.requests_seen = []
+    second = get_commits("o/r", "v1", "v2", None, cache_dir=str(tmp_path), api=api)
+    assert format_release_notes(second) == format_release_notes(first)
+    assert {status for _, _, status in StandInAPI.requests_seen} == {304}
+    assert len(StandInAPI.requests_seen) == 3
+
+
+def test_missing_since_uses_previous_tag(api, monkeypatch):
+    monkeypatch.setattr(generate_release_notes, "resolve_previous_tag", lambda until, cwd: "v1")
+    commits = get_commits("o/r", None, "v2", None, api=api)
+    assert len(commits) == TOTAL_COMMITS
+    assert all("/compare/v1...v2" in path for path, _, _ in StandInAPI.requests_seen)
+
+
+def test_without_previous_tag_only_latest_page_is_fetched(api, monkeypatch, capsys):
+    monkeypatch.setattr(generate_release_notes, "resolve_previous_tag", lambda until, cwd: None)
+    commits = get_commits("o/r", None, None, None, api=api)
+    assert len(commits) == generate_release_notes.PER_PAGE
+    assert StandInAPI.requests_seen == [("/repos/o/r/commits", 1, 200)]
+    assert "Warning: no tag found before HEAD" in capsys.readouterr().err
+
+
+def git(cwd, *args, day=1):
+    date = f"2024-03-{day:02d}T12:00:00+00:00"
+    env = {
+        **os.environ,
+        "GIT_AUTHOR_NAME": "Dev", "GIT_AUTHOR_EMAIL": "dev@example.com", "GIT_AUTHOR_DATE": date,
+        "GIT_COMMITTER_NAME": "Dev", "GIT_COMMITTER_EMAIL": "dev@example.com", "GIT_COMMITTER_DATE": date,
+    }
+    subprocess.run(["git", *args], cwd=cwd, env=env, check=True, capture_output=True)
+
+
+@pytest.fixture
+def checkout(tmp_path):
+    """A repository with tags v1.0 and v1.1, a merge in between and one commit after."""
+    git(tmp_path, "init", "-q", "-b", "main")
+    git(tmp_path, "commit", "-q", "--allow-empty", "-m", "Initial commit", day=1)
+    git(tmp_path, "tag", "v1.0")
+    git(tmp_path, "checkout", "-q", "-b", "feature")
+    git(tmp_path, "commit", "-q", "--allow-empty", "-m", "Add feature\n\nLonger description\nover two lines", day=2)
+    git(tmp_path, "checkout", "-q", "main")
+    git(tmp_path, "commit", "-q", "--allow-empty", "-m", "Fix crash", day=3)
+    git(tmp_path, "merge", "-q", "--no-ff", "feature", "-m", "Merge branch 'feature'", day=4)
+    git(tmp_path, "tag", "v1.1")
+    git(tmp_path, "commit", "-q", "--allow-empty", "-m", "Start next release", day=5)
+    return str(tmp_path)
+
+
+def test_local_commits_between_tags_oldest_first(checkout):
+    commits = get_local_commits("v1.0", "v1.1", checkout)
+    assert [c["commit"]["message"] for c in commits] == [
+        "Add feature\n\nLonger description\nover two lines",
+        "Fix crash",
+        "Merge branch 'feature'",
+    ]
+    assert commits[0]["commit"]["author"] == {"name": "Dev", "date": "2024-03-02T12:00:00Z"}
+    assert all(len(c["sha"]) == 40 for c in commits)
+    assert f"* Add feature (`{commits[0]['sha'][:7]}`) by Dev on 2024-03-02" in format_release_notes(commits)
+
+
+def test_local_commits_default_to_previous_tag(checkout):
+    assert resolve_previous_tag("v1.1", checkout) == "v1.0"
+    assert resolve_previous_tag(None, checkout) == "v1.1"
+    assert get_local_commits(None, "v1.1", checkout) == get_local_commits("v1.0", "v1.1", checkout)
+    assert [c["commit"]["message"] for c in get_local_commits(None, None, checkout)] == ["Start next release"]
+
+
+def test_without_previous_tag_local_commits_cover_all_history(checkout):
+    assert resolve_previous_tag("v1.0", checkout) is None
+    assert [c["commit"]["message"] for c in get_local_commits(None, "v1.0", checkout)] == ["Initial commit"]
+
+
+def test_previous_tag_outside_a_checkout(tmp_path):
+    assert resolve_previous_tag(None, str(tmp_path)) is None
@@ -0,0 +1,116 @@
+import io
+import zipfile
+
+import pytest
+
+import update_translations
+from update_translations import build_base_index, extract_placeholders, validate_files, validate_locale
+
+
+BASE = b"""<?xml version="1.0" encoding="utf-8"?>
+<resources>
+    <string name="greeting">Hello %1$s, you have %2$d messages</string>
+    <string name="discount">50%% off</string>
+    <string name="not_translatable" translatable="false">AAIdrive</string>
+    <plurals name="seconds">
+        <item quantity="one">%d second</item>
+        <item quantity="other">%d seconds</item>
+    </plurals>
+    <string-array name="labels">
+        <item>Speed %s</item>
+        <item>Distance %s</item>
+    </string-array>
+</resources>
+"""
+
+
+def resources(body: str) -> bytes:
+    return f'<?xml version="1.0" encoding="utf-8"?>\n<resources>{body}</resources>'.encode("utf-8")
+
+
+@pytest.fixture
+def base_index(tmp_path):
+    path = tmp_path / "strings.xml"
+    path.write_bytes(BASE)
+    return build_base_index(path)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("%1$s and %2$d", ("1$s", "2$d")),
+    ("%s of %s", ("s", "s")),
+    ("%.2f km", ("f",)),
+    ("Open %d%%", ("d",)),
+    ("50% off", ()),
+    ("50 % Rabatt", ()),
+    ("100%ig sicher", ()),
+])
+def test_extract_placeholders(text, expected):
+    assert extract_placeholders(text) == expected
+
+
+def test_valid_translation(base_index):
+    data = resources(
+        '<string name="greeting">Hallo %1$s, du hast %2$d Nachrichten</string>'
+        '<string name="discount">50 % Rabatt</string>'
+        '<plurals name="seconds"><item quantity="one">eine Sekunde</item>'
+        '<item quantity="other">%d Sekunden</item></plurals>'
+        '<string-array name="labels"><item>Tempo %s</item><item>Strecke %s</item></string-array>'
+    )
+    assert validate_locale("values-de/strings.xml", data, base_index) == {"errors": [], "missing": 0}
+
+
+def test_reordered_positional_placeholders(base_index):
+    data = resources('<string name="greeting">%2$d Nachrichten für %1$s</string>')
+    assert validate_locale("values-de/strings.xml", data, base_index)["errors"] == []
+
+
+def test_placeholder_mismatch(base_index):
+    data = resources('<string name="greeting">Hallo %1$d</string>')
+    errors = validate_locale("values-de/strings.xml", data, base_index)["errors"]
+    assert len(errors) == 1 and "'greeting'" in errors[0]
+
+
+def test_string_array_items_compared_individually(base_index):
+    data = resources('<string-array name="labels"><item>Tempo %s</item><item>Strecke</item></string-array>')
+    errors = validate_locale("values-de/strings.xml", data, base_index)["errors"]
+    assert errors == ["values-de/strings.xml: 'labels' item 1 has placeholders [], expected ['s']"]
+
+
+def test_unknown_keys_and_missing_count(base_index):
+    data = resources('<string name="bogus">x</string><string name="not_translatable">x</string>')
+    result = validate_locale("values-de/strings.xml", data, base_index)
+    assert len(result["errors"]) == 2
+    assert result["missing"] == 4
+
+
+def test_malformed_xml(base_index):
+    result = validate_locale("values-de/strings.xml", b"<resources><string name='a'>", base_index)
+    assert result["errors"][0].startswith("values-de/strings.xml: malformed XML")
+
+
+def test_each_tree_uses_its_own_base(tmp_path):
+    (tmp_path / "app/res/values").mkdir(parents=True)
+    (tmp_path / "app/res/values/strings.xml").write_bytes(BASE)
+    (tmp_path / "playstore/res/values").mkdir(parents=True)
+    (tmp_path / "playstore/res/values/strings.xml").write_bytes(resources('<string name="title">AAIdrive</string>'))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("app/res/values-de/strings.xml", resources('<string name="discount">50 % Rabatt</string>'))
+        zf.writestr("playstore/res/values-de/strings.xml", resources('<string name="title">AAIdrive</string>'))
+    files = update_translations.read_archive_strings(buffer.getvalue())
+
+    results = validate_files(files, tmp_path)
+    assert all(not result["errors"] for result in results.values())
+
+
+def test_results_are_cached_by_hash(tmp_path, monkeypatch):
+    (tmp_path / "values").mkdir()
+    (tmp_path / "values/strings.xml").write_bytes(BASE)
+    files = {"values-de/strings.xml": resources('<string name="greeting">%1$s %2$d</string>')}
+    cache_path = tmp_path / "cache.json"
+    first = validate_files(files, tmp_path, cache_path)
+
+    def fail(*args):
+        raise AssertionError("cached locale was validated again")
+    monkeypatch.setattr(update_translations, "_validate_locale_args", fail)
+    assert validate_files(files, tmp_path, cache_path) == first
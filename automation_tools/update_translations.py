@@ -37,10 +37,23 @@ Details
    finished, providing progress feedback in the console.
 3. **Download translations**: Once ready, the build artifact is
    downloaded and saved to a temporary location.
-4. **Extract translations**: The ZIP archive is extracted and the
+4. **Validate translations**: Before anything is written, every
+   ``strings.xml`` in the archive is checked against the base
+   ``values/strings.xml`` of its own resource tree (the app or the Play
+   Store listing) for malformed XML, unknown or missing keys and
+   mismatched format placeholders such as ``%1$s``. Results are cached
+   by file hash, so unchanged locales are not parsed again.
+5. **Extract translations**: The ZIP archive is extracted and the
    relevant ``strings.xml`` files are copied into the target
    Android resource directories (e.g., ``values-de/strings.xml``).
 
+The validator can also be run on its own against the checked-in
+resources, without a Crowdin token:
+
+```
+python3 update_translations.py --validate-only --target app/src/main/res
+```
+
 This script is intentionally general so that additional localization
 targets (such as different product flavors or modules) can be added
 easily. All HTTP interactions include helpful error messages to
@@ -48,20 +61,37 @@ facilitate troubleshooting.
 """
 
 import argparse
+import hashlib
 import json
 import os
+import re
 import sys
 import time
 import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
-import requests
+try:
+    import requests  # type: ignore
+except ImportError:
+    requests = None  # type: ignore
 
 
 API_BASE = os.getenv("CROWDIN_API_BASE", "https://api.crowdin.com/api/v2")
 
+# Bump whenever the validation rules change so stale cache entries are ignored.
+VALIDATOR_VERSION = 3
+
+DEFAULT_VALIDATION_CACHE = ".translation_validation_cache.json"
+
+# Android/Java format specifiers, e.g. ``%s``, ``%1$s``, ``%.2f`` or ``%%``.
+# The space flag is not accepted so that a literal percent sign followed by
+# a word ("50% off", "50 % Rabatt") is not mistaken for a placeholder.
+PLACEHOLDER_RE = re.compile(r"%(?:(\d+)\$)?[-#+0,(]*\d*(?:\.\d+)?([bBhHsScCdoxXeEfgGaAn%])")
+
 
 def start_translation_build(project_id: str, branch: str, token: str) -> str:
     """Initiate a translations build on Crowdin and return the build ID.
@@ -163,12 +193,274 @@ def extract_and_copy(zip_bytes: bytes, target_dir: Path) -> None:
                 print(f"Updated {target_path}")
 
 
+def extract_placeholders(text: str) -> Tuple[str, ...]:
+    """Return the sorted format placeholders used in a string resource.
+
+    Escaped percent signs (``%%``) are ignored. Positional placeholders
+    keep their index (``1$s``) so reordering them is allowed while
+    changing their type or number is not.
+    """
+    found = []
+    for match in PLACEHOLDER_RE.finditer(text):
+        position, conversion = match.groups()
+        if conversion == "%":
+            continue
+        found.append(f"{position}${conversion}" if position else conversion)
+    return tuple(sorted(found))
+
+
+def iter_string_resources(source):
+    """Stream ``(kind, name, attrib, texts)`` tuples from a resources file.
+
+    ``source`` is a path or binary file object. ``texts`` holds the text of
+    a ``<string>`` or of each ``<item>`` of ``<plurals>`` and
+    ``<string-array>``. Elements are cleared once read so memory stays
+    flat regardless of file size.
+
+    Raises:
+        xml.etree.ElementTree.ParseError: If the XML is malformed.
+    """
+    depth = 0
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            continue
+        depth -= 1
+        if depth != 1:
+            continue
+        if elem.tag == "string":
+            texts = ["".join(elem.itertext())]
+        elif elem.tag in ("plurals", "string-array"):
+            texts = ["".join(item.itertext()) for item in elem.iter("item")]
+        else:
+            elem.clear()
+            continue
+        yield elem.tag, elem.get("name"), dict(elem.attrib), texts
+        elem.clear()
+
+
+def build_base_index(base_path: Path) -> Dict[str, dict]:
+    """Index the translatable keys of the base ``values/strings.xml``.
+
+    Args:
+        base_path: Path to the default-locale ``strings.xml``.
+
+    Returns:
+        A mapping from resource name to its kind and expected placeholders.
+        Plurals map to the placeholders of all quantities combined, strings
+        and string arrays to one placeholder list per text. Strings marked
+        ``formatted="false"`` have no placeholder check.
+    """
+    index: Dict[str, dict] = {}
+    for kind, name, attrib, texts in iter_string_resources(str(base_path)):
+        if attrib.get("translatable") == "false":
+            continue
+        placeholders = None
+        if attrib.get("formatted") != "false":
+            if kind == "plurals":
+                merged = set()
+                for text in texts:
+                    merged.update(extract_placeholders(text))
+                placeholders = sorted(merged)
+            else:
+                # One list per <string-array> item; a <string> has exactly one
+                placeholders = [list(extract_placeholders(text)) for text in texts]
+        index[name] = {"kind": kind, "placeholders": placeholders}
+    return index
+
+
+def validate_locale(locale: str, data: bytes, base_index: Dict[str, dict]) -> dict:
+    """Validate a single translated ``strings.xml`` against the base index.
+
+    Args:
+        locale: Archive path of the file, used in messages.
+        data: The raw file contents.
+        base_index: The index produced by :func:`build_base_index`.
+
+    Returns:
+        A dict with a list of ``errors`` and the number of ``missing`` keys.
+        Missing keys are not errors since Android falls back to the base
+        string, but unknown keys, kind mismatches and placeholder
+        mismatches are.
+    """
+    errors: List[str] = []
+    seen = set()
+    try:
+        for kind, name, attrib, texts in iter_string_resources(BytesIO(data)):
+            seen.add(name)
+            base = base_index.get(name)
+            if base is None:
+                errors.append(f"{locale}: unknown key '{name}'")
+                continue
+            if base["kind"] != kind:
+                errors.append(f"{locale}: '{name}' is a <{kind}> but the base defines a <{base['kind']}>")
+                continue
+            expected = base["placeholders"]
+            if expected is None or attrib.get("formatted") == "false":
+                continue
+            if kind == "plurals":
+                # Quantity items such as "one" may legitimately drop the number.
+                for text in texts:
+                    extra = set(extract_placeholders(text)) - set(expected)
+                    if extra:
+                        errors.append(f"{locale}: '{name}' uses unexpected placeholders {sorted(extra)}")
+            elif len(texts) != len(expected):
+                errors.append(f"{locale}: '{name}' has {len(texts)} items, expected {len(expected)}")
+            else:
+                for position, (text, wanted) in enumerate(zip(texts, expected)):
+                    actual = list(extract_placeholders(text))
+                    if actual != wanted:
+                        item = f" item {position}" if kind == "string-array" else ""
+                        errors.append(f"{locale}: '{name}'{item} has placeholders {actual}, expected {wanted}")
+    except ET.ParseError as e:
+        return {"errors": [f"{locale}: malformed XML: {e}"], "missing": 0}
+    missing = sum(1 for name in base_index if name not in seen)
+    return {"errors": errors, "missing": missing}
+
+
+def _validate_locale_args(args: tuple) -> dict:
+    return validate_locale(*args)
+
+
+def validate_translations(
+    files: Dict[str, bytes],
+    base_paths: Dict[str, Path],
+    cache_path: Optional[Path] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, dict]:
+    """Validate translated ``strings.xml`` files, reusing cached results.
+
+    Each file is keyed by the SHA-256 of its contents together with the
+    hash of its base file, so only changed locales are parsed again. The
+    stale files are checked in parallel worker processes.
+
+    Args:
+        files: Mapping from locale path (e.g. ``values-de/strings.xml``) to
+            file contents.
+        base_paths: Mapping from each locale path to the default-locale
+            file of its resource tree.
+        cache_path: Optional JSON file holding previous results.
+        workers: Maximum number of worker processes.
+
+    Returns:
+        A mapping from locale path to its validation result.
+    """
+    base_hashes = {
+        base_path: hashlib.sha256(base_path.read_bytes()).hexdigest()
+        for base_path in set(base_paths.values())
+    }
+    cache: Dict[str, dict] = {}
+    if cache_path and cache_path.exists():
+        try:
+            cache = json.loads(cache_path.read_text())
+        except ValueError:
+            cache = {}
+        if cache.get("version") != VALIDATOR_VERSION:
+            cache = {}
+    cached_results = cache.get("locales", {})
+
+    results: Dict[str, dict] = {}
+    stale: Dict[str, dict] = {}
+    for locale, data in files.items():
+        key = {"sha256": hashlib.sha256(data).hexdigest(), "base": base_hashes[base_paths[locale]]}
+        entry = cached_results.get(locale)
+        if entry and entry.get("sha256") == key["sha256"] and entry.get("base") == key["base"]:
+            results[locale] = entry["result"]
+        else:
+            stale[locale] = key
+
+    if stale:
+        base_indexes = {base_path: build_base_index(base_path) for base_path in {base_paths[locale] for locale in stale}}
+        jobs = [(locale, files[locale], base_indexes[base_paths[locale]]) for locale in stale]
+        if len(jobs) == 1:
+            fresh = [_validate_locale_args(jobs[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                fresh = list(executor.map(_validate_locale_args, jobs))
+        for (locale, _, _), result in zip(jobs, fresh):
+            results[locale] = result
+
+        if cache_path:
+            for locale, key in stale.items():
+                cached_results[locale] = {**key, "result": results[locale]}
+            cache = {"version": VALIDATOR_VERSION, "locales": cached_results}
+            cache_path.write_text(json.dumps(cache, indent=1, sort_keys=True))
+    return results
+
+
+def find_base_file(locale: str, target_dir: Path) -> Optional[Path]:
+    """Find the default-locale file that a translated file belongs to.
+
+    A Crowdin bundle holds several resource trees (the app and the Play
+    Store listing), so ``app/src/main/res/values-de/strings.xml`` is checked
+    against ``app/src/main/res/values/strings.xml`` and
+    ``playstore/res/values-de/strings.xml`` against
+    ``playstore/res/values/strings.xml``. The tree is looked up below
+    ``target_dir`` first, where the file will be extracted to, and then
+    relative to the working directory.
+    """
+    path = Path(locale)
+    tree = path.parent.parent
+    for root in (target_dir, Path(".")):
+        candidate = root / tree / "values" / path.name
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def read_archive_strings(zip_bytes: bytes) -> Dict[str, bytes]:
+    """Read every ``strings.xml`` from a translations ZIP into memory."""
+    with zipfile.ZipFile(BytesIO(zip_bytes)) as zf:
+        return {member: zf.read(member) for member in zf.namelist() if member.endswith("strings.xml")}
+
+
+def read_resource_strings(target_dir: Path) -> Dict[str, bytes]:
+    """Read every translated ``values-*/strings.xml`` below ``target_dir``."""
+    return {
+        f"{path.parent.name}/{path.name}": path.read_bytes()
+        for path in sorted(target_dir.glob("values-*/strings.xml"))
+    }
+
+
+def validate_files(
+    files: Dict[str, bytes],
+    target_dir: Path,
+    cache_path: Optional[Path] = None,
+) -> Dict[str, dict]:
+    """Validate each file against the base file of its own resource tree.
+
+    Files without a matching base file cannot be checked and are skipped
+    with a note.
+    """
+    base_paths = {}
+    for locale in files:
+        base_path = find_base_file(locale, target_dir)
+        if base_path is None:
+            print(f"{locale}: no base strings file found, not validated")
+        else:
+            base_paths[locale] = base_path
+    checked = {locale: data for locale, data in files.items() if locale in base_paths}
+    return validate_translations(checked, base_paths, cache_path)
+
+
+def report_validation(results: Dict[str, dict]) -> bool:
+    """Print validation results and return whether all locales passed."""
+    ok = True
+    for locale in sorted(results):
+        result = results[locale]
+        for error in result["errors"]:
+            print(f"Error: {error}", file=sys.stderr)
+            ok = False
+        if result["missing"]:
+            print(f"{locale}: {result['missing']} untranslated strings")
+    return ok
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Update project translations from Crowdin")
     parser.add_argument(
         "--project-id",
-        required=True,
-        help="The Crowdin project ID to build translations for",
+        help="The Crowdin project ID to build translations for (required unless --validate-only)",
     )
     parser.add_argument(
         "--branch",
@@ -185,8 +477,44 @@ def main() -> None:
         action="store_true",
         help="Only trigger the build and download the archive without extracting",
     )
+    parser.add_argument(
+        "--validate-only",
+        action="store_true",
+        help="Validate the translations already in --target and exit, without contacting Crowdin",
+    )
+    parser.add_argument(
+        "--skip-validation",
+        action="store_true",
+        help="Extract the downloaded translations even if validation fails",
+    )
+    parser.add_argument(
+        "--validation-cache",
+        default=DEFAULT_VALIDATION_CACHE,
+        help=f"Cache file for validation results (default: {DEFAULT_VALIDATION_CACHE})",
+    )
     args = parser.parse_args()
 
+    target_dir = Path(args.target)
+    cache_path = Path(args.validation_cache) if args.validation_cache else None
+
+    if args.validate_only:
+        try:
+            results = validate_files(read_resource_strings(target_dir), target_dir, cache_path)
+        except (OSError, ET.ParseError) as e:
+            print(f"Error while validating translations: {e}", file=sys.stderr)
+            sys.exit(1)
+        if not report_validation(results):
+            sys.exit(1)
+        print(f"Validated {len(results)} locales.")
+        return
+
+    if not args.project_id:
+        parser.error("--project-id is required unless --validate-only is given")
+
+    if requests is None:
+        print("Error: The requests library is not installed. Please install requests to use this script.", file=sys.stderr)
+        sys.exit(1)
+
     token = os.getenv("CROWDIN_API_TOKEN")
     if not token:
         print("Error: CROWDIN_API_TOKEN environment variable not set.", file=sys.stderr)
@@ -203,7 +531,10 @@ def main() -> None:
             f.write(zip_data)
         print(f"Downloaded translations archive to {archive_path}")
         if not args.no_extract:
-            target_dir = Path(args.target)
+            print("Validating translations...")
+            results = validate_files(read_archive_strings(zip_data), target_dir, cache_path)
+            if not report_validation(results) and not args.skip_validation:
+                raise RuntimeError("translation validation failed, use --skip-validation to extract anyway")
             extract_and_copy(zip_data, target_dir)
             print("Translations updated.")
     except Exception as e: